@@ -1,6 +1,5 @@
 import sys
 import tomllib
-import json
 import faulthandler
 import os
 import shutil
@@ -20,11 +19,11 @@ from PySide6.QtWidgets import (
     QGridLayout,
     QPushButton,
 )
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, Signal, QObject, QMutex, QMutexLocker, QRunnable, QThreadPool
 
 import theme
 from timeline import Timeline
-from utils import chain
+from utils import chain, dumpProject, readProject
 from project import Scene, SCENES, ProjectElement
 from timeline import Label, TimeClock, TimeMusic, SceneCue
 
@@ -34,6 +33,58 @@ class Application(QApplication):
     saveProject = Signal()
 
 
+# QRunnable isn't a QObject, so ProjectWriter reports through this one. It
+# lives in the GUI thread, signals emitted by the worker are queued to it.
+class ProjectWriterSignals(QObject):
+    # The latest data has been written.
+    saved = Signal()
+    failed = Signal(str)
+
+
+class ProjectWriter(QRunnable):
+    # Writes serialized project data to disk on a worker thread so that slow
+    # disks never block the UI. Only the latest data is kept: writes requested
+    # while one is in progress collapse into a single follow-up write.
+    def __init__(self, path):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.path = path
+        self.mutex = QMutex()
+        self.pending = None
+        self.running = False
+        self.signals = ProjectWriterSignals()
+
+    def write(self, data):
+        with QMutexLocker(self.mutex):
+            self.pending = data
+            if self.running:
+                return
+            self.running = True
+        QThreadPool.globalInstance().start(self)
+
+    def run(self):
+        saved = False
+        while True:
+            with QMutexLocker(self.mutex):
+                data = self.pending
+                self.pending = None
+                if data is None:
+                    self.running = False
+                    break
+            # Write to a temporary file first so that a failed write never
+            # leaves a truncated project behind. A failure must not stop the
+            # worker either, or every later save would be dropped.
+            try:
+                with open(self.path + ".tmp", "wb") as f:
+                    f.write(data)
+                os.replace(self.path + ".tmp", self.path)
+                saved = True
+            except OSError as e:
+                saved = False
+                self.signals.failed.emit(f"Failed to save {self.path}: {e}")
+        if saved:
+            self.signals.saved.emit()
+
 class PresetsTab(QWidget):
     COLUMNS = 4
 
@@ -86,8 +137,7 @@ class MainWindow(QMainWindow):
         os.makedirs("backups", exist_ok=True)
         try:
             shutil.copy("animusic.json", f"backups/animusic.{datetime.now().strftime('%Y%m%dT%H%M%S')}.json")
-            with open("animusic.json", "r") as f:
-                data = json.loads(f.read())
+            data = readProject("animusic.json")
         except FileNotFoundError:
             pass
 
@@ -98,6 +148,9 @@ class MainWindow(QMainWindow):
             self.timeline = Timeline.load(bottom_layout, **data["timeline"])
         else:
             self.timeline = Timeline(bottom_layout)
+        self.writer = ProjectWriter("animusic.json")
+        self.writer.signals.saved.connect(self.saved)
+        self.writer.signals.failed.connect(self.saveFailed)
         QApplication.instance().saveProject.connect(self.save)
 
         scroll_area = QScrollArea()
@@ -146,8 +199,17 @@ class MainWindow(QMainWindow):
             "presets": self.presets_tab.save(),
             "timeline": self.timeline.save(),
         }
-        with open("animusic.json", "w") as f:
-            f.write(json.dumps(out, indent=2))
+        self.writer.write(dumpProject(out))
+
+    def saved(self):
+        self.timeline.changesSaved()
+        self.statusBar().clearMessage()
+
+    # Saving happens in the background, the error stays in the status bar
+    # until a later save succeeds. The changes are still unsaved.
+    def saveFailed(self, error):
+        self.timeline.unsaved_changes = True
+        self.statusBar().showMessage(error)
 
 
 faulthandler.enable()
@@ -156,3 +218,5 @@ theme.load()
 window = MainWindow()
 window.show()
 app.exec()
+# Let a save requested on quit reach the disk.
+QThreadPool.globalInstance().waitForDone()
@@ -0,0 +1,41 @@
+import pytest
+
+import utils
+
+
+PROJECT = {
+    "project": {"elements": [{"type": "Scene", "id": 1, "name": "Entrée – ♩"}]},
+    "timeline": {
+        "scale": 0.05,
+        "rows": [
+            {
+                "type": "SceneRow",
+                "name": "Scènes",
+                "elements": [{"type": "SceneCue", "start": 0, "length": 1000, "scene": 1}],
+            },
+        ],
+    },
+}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(utils, "orjson", None)
+    return request.param
+
+
+def test_round_trip_non_ascii(encoder, tmp_path):
+    path = tmp_path / "animusic.json"
+    path.write_bytes(utils.dumpProject(PROJECT))
+    assert utils.readProject(path) == PROJECT
+
+
+def test_encoders_write_the_same_utf8(monkeypatch):
+    pytest.importorskip("orjson")
+    fast = utils.dumpProject(PROJECT)
+    monkeypatch.setattr(utils, "orjson", None)
+    assert utils.dumpProject(PROJECT) == fast
+    assert "Entrée – ♩".encode("utf-8") in fast
@@ -1,7 +1,6 @@
 from abc import ABC, abstractmethod
 
 from PySide6.QtGui import (
-    QPainterPath,
     QPainter,
     QBrush,
     QPen,
@@ -29,17 +28,7 @@ class Cue(TimelineElement):
     def getText(self):
         pass
 
-    def paint(self, painter, rect, state):
-        qpp = QPainterPath()
-        qpp.addRoundedRect(
-            rect,
-            self.ROUNDING_RADIUS,
-            self.ROUNDING_RADIUS,
-        )
-
-        # Fix bad anti-aliasing rendering
-        qpp.translate(0.5, 0.5)
-
+    def paint(self, painter, rect, state, bounds):
         brush = QBrush()
         if state == State.NONE:
             brush.setColor(self.getColor())
@@ -56,10 +45,16 @@ class Cue(TimelineElement):
             pen.setColor(theme.OUTLINE)
         pen.setWidth(1)
 
+        # Fill and outline in a single primitive. Translated to fix bad
+        # anti-aliasing rendering.
         painter.setRenderHint(QPainter.Antialiasing, True)
-        painter.fillPath(qpp, brush)
         painter.setPen(pen)
-        painter.drawPath(qpp)
+        painter.setBrush(brush)
+        painter.drawRoundedRect(
+            rect.translated(0.5, 0.5),
+            self.ROUNDING_RADIUS,
+            self.ROUNDING_RADIUS,
+        )
 
         pen = QPen()
         pen.setColor(theme.TEXT)
@@ -1,5 +1,4 @@
 from PySide6.QtGui import (
-    QPainterPath,
     QPainter,
     QBrush,
     QPen,
@@ -31,13 +30,7 @@ class Label(TimelineElement):
 
     text = property(get_text, set_text)
 
-    def paint(self, painter, rect, state):
-        qpp = QPainterPath()
-        qpp.addRect(rect)
-
-        # Fix bad anti-aliasing rendering
-        qpp.translate(0.5, 0.5)
-
+    def paint(self, painter, rect, state, bounds):
         brush = QBrush()
         if state == State.NONE:
             brush.setColor(theme.LABEL_BG)
@@ -54,10 +47,12 @@ class Label(TimelineElement):
             pen.setColor(theme.OUTLINE)
         pen.setWidth(1)
 
+        # Fill and outline in a single primitive. Translated to fix bad
+        # anti-aliasing rendering.
         painter.setRenderHint(QPainter.Antialiasing, True)
-        painter.fillPath(qpp, brush)
         painter.setPen(pen)
-        painter.drawPath(qpp)
+        painter.setBrush(brush)
+        painter.drawRect(rect.translated(0.5, 0.5))
 
         pen = QPen()
         pen.setColor(theme.TEXT)
@@ -1,14 +1,15 @@
 from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
 from functools import lru_cache
+from operator import itemgetter
 
 from PySide6.QtGui import (
-    QPainterPath,
     QPainter,
     QBrush,
     QPen,
 )
 from PySide6.QtWidgets import QApplication, QGroupBox, QVBoxLayout, QSpinBox
-from PySide6.QtCore import Qt, QRect
+from PySide6.QtCore import Qt, QRect, QLine
 
 import theme
 from .common import State, TimelineElement
@@ -22,19 +23,52 @@ class Time(TimelineElement):
     RULER_LABEL_LEFT_OFFSET = 2
     RULER_LABEL_TOP_OFFSET = 3
 
+    def __init__(self, start, length):
+        # Markings the snap lists were built from, see snaps().
+        self.snaps_markings = None
+        self.fine_snaps = []
+        self.coarse_snaps = []
+        super().__init__(start, length)
+
     @abstractmethod
     def get_name(self):
         pass
 
     @abstractmethod
-    def markings(self):
+    def markings(self, x_min=None, x_max=None):
         pass
 
     @abstractmethod
     def get_marking_label_width(self):
         pass
 
-    def paint(self, painter, rect, state):
+    # Snap positions at every marking, or only labelled ones when coarse.
+    # Markings are cached for unchanged properties, so the lists are only
+    # rebuilt when markings() returns a different list.
+    def snaps(self, coarse=False):
+        markings = self.markings()
+        if markings is not self.snaps_markings:
+            self.snaps_markings = markings
+            self.fine_snaps = [x for x, label in markings]
+            self.coarse_snaps = [x for x, label in markings if label]
+        return self.coarse_snaps if coarse else self.fine_snaps
+
+    @staticmethod
+    def _clip_markings(markings, x_min, x_max):
+        # Unclipped markings are the cached list itself.
+        if x_min is None and x_max is None:
+            return markings
+        # Markings are sorted by x, so the ones inside [x_min, x_max] are a
+        # contiguous slice.
+        lo = 0
+        hi = len(markings)
+        if x_min is not None:
+            lo = bisect_left(markings, x_min, key=itemgetter(0))
+        if x_max is not None:
+            hi = bisect_right(markings, x_max, key=itemgetter(0))
+        return markings[lo:hi]
+
+    def paint(self, painter, rect, state, bounds):
         scale = rect.width() / self.get_length()
         # rect but with a height of TEXT_HEIGHT.
         text_rect = rect.adjusted(0, 0, 0, -(rect.height() - self.TEXT_HEIGHT))
@@ -42,12 +76,6 @@ class Time(TimelineElement):
         ruler_rect = rect.adjusted(0, self.TEXT_HEIGHT, 0, 0)
 
         # Time header
-        qpp = QPainterPath()
-        qpp.addRect(text_rect)
-
-        # Fix bad anti-aliasing rendering
-        qpp.translate(0.5, 0.5)
-
         brush = QBrush()
         brush.setStyle(Qt.SolidPattern)
         if state == State.NONE:
@@ -61,10 +89,12 @@ class Time(TimelineElement):
         pen.setColor(theme.OUTLINE)
         pen.setWidth(1)
 
+        # Fill and outline in a single primitive. Translated to fix bad
+        # anti-aliasing rendering.
         painter.setRenderHint(QPainter.Antialiasing, True)
-        painter.fillPath(qpp, brush)
         painter.setPen(pen)
-        painter.drawPath(qpp)
+        painter.setBrush(brush)
+        painter.drawRect(text_rect.translated(0.5, 0.5))
 
         pen = QPen()
         pen.setColor(theme.TEXT)
@@ -89,46 +119,57 @@ class Time(TimelineElement):
         ruler_pen.setColor(theme.RULER)
         ruler_pen.setWidth(0)
 
-        painter.setFont(theme.RULER_MARKING_FONT)
-        for x, label in self.markings():
+        # Collect the whole ruler first so that the render hints and pens only
+        # change once per pass instead of once per marking.
+        # Ruler geometry is whole pixels so it stays on the aliased raster path.
+        ruler_top = round(ruler_rect.y())
+        ruler_bottom = round(ruler_rect.y() + ruler_rect.height())
+        label_width = round(self.get_marking_label_width() * scale)
+        lines = []
+        labels = []
+        # Only markings in view, plus those whose label reaches into view.
+        # Markings are placed relative to the element's rect: its edges are
+        # rounded, so scale is slightly off and absolute x * scale would
+        # drift further from the rect the later the element starts.
+        visible_markings = self.markings(
+            self.start + (bounds[0] - rect.left()) / scale - self.get_marking_label_width(),
+            self.start + (bounds[1] - rect.left()) / scale,
+        )
+        for x, label in visible_markings:
+            px = round(rect.left() + (x - self.start) * scale)
             if label:
-                # Marking text
-                painter.setRenderHint(QPainter.Antialiasing, True)
-                painter.setPen(text_pen)
-                label_rect = QRect(
-                    x * scale + self.RULER_LABEL_LEFT_OFFSET,
-                    ruler_rect.y() + self.RULER_LABEL_TOP_OFFSET,
-                    self.get_marking_label_width() * scale,
-                    ruler_rect.height(),
-                )
-                if (
-                    textWidth(theme.RULER_MARKING_FONT, label) + self.RULER_LABEL_LEFT_OFFSET
-                    < label_rect.width()
-                ):
-                    painter.drawText(
-                        label_rect,
-                        Qt.AlignLeft | Qt.AlignTop,
-                        label,
-                    )
-
                 # Full-height marking
-                painter.setRenderHint(QPainter.Antialiasing, False)
-                painter.setPen(ruler_pen)
-                painter.drawLine(
-                    x * scale,
-                    ruler_rect.y(),
-                    x * scale,
-                    ruler_rect.y() + ruler_rect.height(),
-                )
+                lines.append(QLine(px, ruler_top, px, ruler_bottom))
+                labels.append((px, label))
             else:
                 # Half-height marking
-                painter.setRenderHint(QPainter.Antialiasing, False)
-                painter.setPen(ruler_pen)
-                painter.drawLine(
-                    x * scale,
-                    ruler_rect.y() + ruler_rect.height() - self.SHORT_MARK_HEIGHT,
-                    x * scale,
-                    ruler_rect.y() + ruler_rect.height(),
+                lines.append(
+                    QLine(px, ruler_bottom - self.SHORT_MARK_HEIGHT, px, ruler_bottom)
+                )
+
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        painter.setPen(ruler_pen)
+        painter.drawLines(lines)
+
+        # Marking text
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        painter.setPen(text_pen)
+        painter.setFont(theme.RULER_MARKING_FONT)
+        for px, label in labels:
+            label_rect = QRect(
+                px + self.RULER_LABEL_LEFT_OFFSET,
+                ruler_top + self.RULER_LABEL_TOP_OFFSET,
+                label_width,
+                ruler_bottom - ruler_top,
+            )
+            if (
+                textWidth(theme.RULER_MARKING_FONT, label) + self.RULER_LABEL_LEFT_OFFSET
+                < label_rect.width()
+            ):
+                painter.drawText(
+                    label_rect,
+                    Qt.AlignLeft | Qt.AlignTop,
+                    label,
                 )
 
 
@@ -167,8 +208,10 @@ class TimeClock(Time):
         out.append((x, " "))
         return out
 
-    def markings(self):
-        return TimeClock._markings(self.start, self.duration)
+    def markings(self, x_min=None, x_max=None):
+        return self._clip_markings(
+            TimeClock._markings(self.start, self.duration), x_min, x_max
+        )
 
     def get_marking_label_width(self):
         return theme.PIXELS_PER_SECOND
@@ -263,8 +306,12 @@ class TimeMusic(Time):
         out.append((x, " "))
         return out
 
-    def markings(self):
-        return TimeMusic._markings(self.start, self.duration, self.bpm, self.beats_per_bar, self.starting_beat, self.starting_bar, self.get_pixels_per_beat())
+    def markings(self, x_min=None, x_max=None):
+        return self._clip_markings(
+            TimeMusic._markings(self.start, self.duration, self.bpm, self.beats_per_bar, self.starting_beat, self.starting_bar, self.get_pixels_per_beat()),
+            x_min,
+            x_max,
+        )
     
     def get_marking_label_width(self):
         return self.get_pixels_per_beat() * self.beats_per_bar
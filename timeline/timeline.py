@@ -1,53 +1,126 @@
-import json
 import sys
-import shutil
-import os
-from abc import ABC, abstractmethod
-from datetime import datetime
+from bisect import bisect_left, bisect_right, insort
+from operator import add
 
 from PySide6.QtGui import (
     QCursor,
-    QPainterPath,
     QPainter,
+    QPixmap,
     QBrush,
     QPen,
+    QPolygon,
 )
 from PySide6.QtWidgets import (
     QWidget,
     QApplication,
-    QSizePolicy,
 )
-from PySide6.QtCore import Qt, QPoint, QRect, QRectF, QTimer
+from PySide6.QtCore import Qt, QElapsedTimer, QLine, QPoint, QRect, QRectF, QTimer
 
 import theme
-from utils import chain, textWidth, saveProject
+from utils import saveProject
 from .common import State, TimelineElement
 from .time import Time, TimeClock, TimeMusic
 from .cue import LightingCue, SceneCue
 from .labels import Label
 
 
-class Row(ABC):
+# Returns the closest snap within tolerance of value, or None. snaps must be
+# sorted.
+def findSnap(value, snaps, tolerance):
+    # Only the snaps directly either side of value can be the closest.
+    i = bisect_left(snaps, value)
+    neighbours = snaps[max(i - 1, 0):i + 1]
+    if not neighbours:
+        return None
+    snap = min(neighbours, key=lambda snap: abs(value - snap))
+    if abs(value - snap) < tolerance:
+        return snap
+    return None
+
+
+class Row:
     SAVED_ATTRIBUTES = []
     ALLOWED_TYPES = []
     HEIGHT = 30
     ROW_PADDING = 0
+    # Rows whose contents rarely change are rendered into a pixmap covering
+    # the visible area (plus a viewport's width either side) and blitted from
+    # there until something invalidates it.
+    CACHE_PIXMAP = False
 
-    def __init__(self, timeline, elements=[]):
+    def __init__(self, timeline, elements=None):
         self.timeline = timeline
-        self.elements = elements
+        # Kept sorted by start from the beginning so that add/remove can
+        # bisect instead of re-sorting (e.g. while loading a project).
+        self.elements = sorted(elements, key=lambda e : e.start) if elements else []
         self.elements_set = set(self.elements)
+        self.starts = None
+        self.lengths = None
+        self.max_end = 0
+        self.max_length = 0
+        self.cached_rects = None
+        self.cached_pixmap = None
+        self.cached_pixmap_left = 0
+        self.cached_pixmap_right = 0
+        self.cached_pixmap_ratio = None
 
     def add(self, element):
         self.elements_set.add(element)
-        self.elements = sorted(self.elements_set, key=lambda e : e.start)
+        insort(self.elements, element, key=lambda e : e.start)
+        self.invalidate()
 
     def contains(self, element):
         return element in self.elements_set
 
     def remove(self, element):
         self.elements_set.remove(element)
-        self.elements = sorted(self.elements_set, key=lambda e : e.start)
+        self.elements.remove(element)
+        self.invalidate()
+
+    # Element starts are edited in place (dragging, property widgets), so the
+    # row has to be told to restore its ordering afterwards.
+    def reposition(self, element):
+        self.elements.remove(element)
+        insort(self.elements, element, key=lambda e : e.start)
+        self.invalidate()
+
+    def sort(self):
+        self.elements.sort(key=lambda e : e.start)
+        self.invalidate()
+
+    # Cached geometry only depends on the row's elements, their start/length,
+    # whether they're being dragged and the timeline scale. Whatever changes
+    # those must invalidate it.
+    def invalidate(self):
+        self.starts = None
+        self.lengths = None
+        self.cached_rects = None
+        self.cached_pixmap = None
+
+    # Parallel lists of the elements' starts and lengths. Reading those goes
+    # through each element's widgets, so it's done once per change rather
+    # than on every use.
+    def geometry(self):
+        if self.starts is None:
+            self.starts = [elem.start for elem in self.elements]
+            self.lengths = [elem.length for elem in self.elements]
+            self.max_end = max(map(add, self.starts, self.lengths), default=0)
+            self.max_length = max(self.lengths, default=0)
+        return self.starts, self.lengths
+
+    # Indices of the elements overlapping [left, right] (timeline units).
+    # Starts are sorted, so only elements starting between left minus the
+    # longest element and right need checking.
+    def elementsIn(self, left, right):
+        starts, lengths = self.geometry()
+        first = bisect_left(starts, left - self.max_length)
+        last = bisect_right(starts, right)
+        return [i for i in range(first, last) if starts[i] + lengths[i] >= left]
+
+    # End of the last-ending element.
+    def maxEnd(self):
+        self.geometry()
+        return self.max_end
 
     def canContain(self, element):
         if isinstance(element, type):
@@ -56,37 +129,126 @@ class Row(ABC):
             isinstance(element, allowed_type) for allowed_type in self.ALLOWED_TYPES
         )
 
+    # The returned rects are shared, callers must not modify them in place.
     def elementsRects(self):
-        for elem in self.elements:
-            rect = QRectF(
-                elem.start * self.timeline.scale,
-                self.ROW_PADDING / 2,
-                elem.length * self.timeline.scale,
-                self.HEIGHT - self.ROW_PADDING,
-            )
-            yield elem, rect
+        if self.cached_rects is None:
+            self.cached_rects = self.buildElementsRects()
+        return self.cached_rects
+
+    def buildElementsRects(self):
+        scale = self.timeline.scale
+        dragged = (self.timeline.moving_element, self.timeline.resizing_element)
+        top = self.ROW_PADDING / 2
+        height = self.HEIGHT - self.ROW_PADDING
+        starts, lengths = self.geometry()
+
+        # Whole pixels keep outlines crisp and on the fast raster path;
+        # only a dragged element benefits from subpixel positioning.
+        def rect(elem, left, right):
+            if elem not in dragged:
+                left = round(left)
+                right = round(right)
+            return QRectF(left, top, right - left, height)
+
+        return [
+            (elem, rect(elem, start * scale, (start + length) * scale))
+            for elem, start, length in zip(self.elements, starts, lengths)
+        ]
 
     def paint(self, painter, y, bounds):
-        # TODO: Display row properties
-        for elem, rect in self.elementsRects():
-            if rect.x() + rect.width() < bounds[0]:
+        # A dragged element changes on every mouse move, caching its row
+        # would mean re-rendering the whole pixmap each time.
+        if (
+            not self.CACHE_PIXMAP
+            or self.contains(self.timeline.moving_element)
+            or self.contains(self.timeline.resizing_element)
+        ):
+            self.paintElements(painter, y, bounds)
+            return
+
+        # Outside the visible area (e.g. when grabbing the whole widget) there
+        # is nothing worth caching.
+        visible = self.timeline.visibleRegion().boundingRect()
+        if bounds[0] < visible.left() or bounds[1] > visible.right():
+            self.paintElements(painter, y, bounds)
+            return
+
+        ratio = self.timeline.devicePixelRatioF()
+        if (
+            self.cached_pixmap is None
+            or self.cached_pixmap_ratio != ratio
+            or visible.left() < self.cached_pixmap_left
+            or visible.right() > self.cached_pixmap_right
+        ):
+            self.cached_pixmap_left = max(visible.left() - visible.width(), 0)
+            self.cached_pixmap_right = min(
+                visible.right() + visible.width(), self.timeline.width() - 1
+            )
+            self.cached_pixmap_ratio = ratio
+            self.cached_pixmap = self.renderPixmap(
+                self.cached_pixmap_left, self.cached_pixmap_right
+            )
+        painter.drawPixmap(self.cached_pixmap_left, y, self.cached_pixmap)
+
+        # The pixmap shows every element unhighlighted. Hovered and selected
+        # elements are repainted on top: their strip of the row is cleared
+        # and painted again with the actual states.
+        margin = self.timeline.UPDATE_MARGIN
+        scale = self.timeline.scale
+        for elem in {self.timeline.hovering_element, self.timeline.selected_element}:
+            if not self.contains(elem):
                 continue
-            if rect.x() > bounds[1]:
-                break
-            rect.adjust(0, y, 0, y)
+            left = max(round(elem.start * scale) - margin, bounds[0])
+            right = min(round((elem.start + elem.length) * scale) + margin, bounds[1])
+            if left > right:
+                continue
+            strip = QRect(left, y, right - left + 1, self.HEIGHT)
+            painter.save()
+            painter.setClipRect(strip)
+            painter.fillRect(strip, theme.BG)
+            self.paintElements(painter, y, (left, right))
+            painter.restore()
+
+    def renderPixmap(self, left, right):
+        ratio = self.timeline.devicePixelRatioF()
+        pixmap = QPixmap(
+            round((right - left + 1) * ratio), round(self.HEIGHT * ratio)
+        )
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.translate(-left, 0)
+        self.paintElements(painter, 0, (left, right), highlight=False)
+        painter.end()
+        return pixmap
+
+    # Paints the elements overlapping bounds. Without highlight, hovered and
+    # selected elements are painted like the others.
+    def paintElements(self, painter, y, bounds, highlight=True):
+        # TODO: Display row properties
+        # Only elements overlapping the painted range (padded by a pixel for
+        # rounding) are drawn, found by bisecting the sorted starts.
+        scale = self.timeline.scale
+        rects = self.elementsRects()
+        for i in self.elementsIn((bounds[0] - 1) / scale, (bounds[1] + 1) / scale):
+            elem, rect = rects[i]
+            rect = rect.translated(0, y)
             state = State.NONE
-            if elem == self.timeline.hovering_element:
-                state = State.HOVERING
-            if elem == self.timeline.selected_element:
-                state = State.SELECTED
-            elem.paint(painter, rect, state)
+            if highlight:
+                if elem == self.timeline.hovering_element:
+                    state = State.HOVERING
+                if elem == self.timeline.selected_element:
+                    state = State.SELECTED
+            elem.paint(painter, rect, state, bounds)
 
     def snaps(self, exclude_element=None):
-        for elem in self.elements:
-            if elem == exclude_element:
-                continue
-            yield elem.start
-            yield elem.start + elem.length
+        starts, lengths = self.geometry()
+        return [
+            snap
+            for elem, start, length in zip(self.elements, starts, lengths)
+            if elem is not exclude_element
+            for snap in (start, start + length)
+        ]
 
     def save(self):
         out = {
@@ -108,23 +270,28 @@ class Row(ABC):
 class LabelRow(Row):
     HEIGHT = 15
     ALLOWED_TYPES = [Label]
+    CACHE_PIXMAP = True
 
 
 class TimeRow(Row):
     HEIGHT = 40
     ALLOWED_TYPES = [TimeClock, TimeMusic]
+    CACHE_PIXMAP = True
+
+    # Drags snap to the time elements' edges as well as their markings.
+    def snaps(self, exclude_element=None):
+        return super().snaps(exclude_element) + self.markingSnaps(exclude_element)
 
-    def snaps(self, exclude_element=None, coarse=False):
-        super().snaps(exclude_element)
+    # Markings only, for seeking. Element edges don't always fall on a
+    # marking (e.g. a fractional number of pixels per beat), so they would
+    # add a second stop right next to the last marking.
+    def markingSnaps(self, exclude_element=None, coarse=False):
+        snaps = []
         for time in self.elements:
-            if time == exclude_element:
+            if time is exclude_element:
                 continue
-            for marking, label in time.markings():
-                if coarse:
-                    if label:
-                        yield marking
-                else:
-                    yield marking
+            snaps.extend(time.snaps(coarse))
+        return snaps
 
 
 class GuideRow(Row):
@@ -142,7 +309,7 @@ class SceneRow(Row):
     HEIGHT = 60
     ROW_PADDING = 6
 
-    def __init__(self, timeline, name, elements=[]):
+    def __init__(self, timeline, name, elements=None):
         super().__init__(timeline, elements)
         self.name = name
 
@@ -159,16 +326,21 @@ class Timeline(QWidget):
     # Bounds
     RESIZE_INNER_BOUND = 10
     RESIZE_OUTER_BOUND = 2
+    UPDATE_MARGIN = 2
 
     # Snapping
-    SNAP_MARKING_PIXELS = 240
+    SNAP_MARKING_PIXELS = 12
 
     # Drawing
     PLAYHEAD_TOP_OFFSET = 2
     PLAYHEAD_BOTTOM_OFFSET = 2
+    PLAYHEAD_ARROW_WIDTH = 10
 
-    # Playback
-    TIMER_INTERVAL = 40
+    # Playback, about one frame at 60 Hz
+    TIMER_INTERVAL = 16
+
+    # Saving
+    SAVE_DELAY = 500
 
     def __init__(self, hboxlayout, scale=0.05):
         super().__init__()
@@ -176,6 +348,8 @@ class Timeline(QWidget):
         self.hboxlayout = hboxlayout
         self.scale = scale
         self.rows = []
+        # Top of each row, only changes when rows are added.
+        self.row_offsets = []
         self.total_row_height = 0
         self.playhead_height = 0
 
@@ -193,18 +367,65 @@ class Timeline(QWidget):
         self.moving_element = None
         self.moving_old_start = 0
 
+        # Snap positions for the current move/resize, collected once when it
+        # starts since the dragged element is excluded for the whole drag.
+        self.drag_snaps = []
+        # Sorted snap lists for keyboard navigation, by kind. Cleared whenever
+        # elements change.
+        self.cached_snaps = {}
+
+        # Painting
+        self.separator_pen = QPen(theme.OUTLINE)
+        self.separator_pen.setWidth(0)
+        self.playhead_pen = QPen(theme.PLAYHEAD)
+        self.playhead_pen.setWidth(1)
+        self.playhead_brush = QBrush(theme.PLAYHEAD, Qt.SolidPattern)
+        # Relative to the playhead's position at the top of the time row.
+        self.playhead_arrow = QPolygon([
+            QPoint(0, self.PLAYHEAD_TOP_OFFSET),
+            QPoint(self.PLAYHEAD_ARROW_WIDTH, (TimeRow.HEIGHT - Time.TEXT_HEIGHT) // 2),
+            QPoint(0, TimeRow.HEIGHT - Time.TEXT_HEIGHT - self.PLAYHEAD_BOTTOM_OFFSET),
+        ])
+
+        self.resize_cursor = QCursor(Qt.SplitHCursor)
+        self.arrow_cursor = QCursor(Qt.ArrowCursor)
+        self.cursor_shape = Qt.ArrowCursor
+
         self.seeking = False
         self.playing = False
         self.playhead = 0
         self.accurate_playhead = 0
+        # Widget x where paintEvent() last drew the playhead, to repaint only
+        # the strip it leaves when it moves.
+        self.playhead_x = 0
         self.play_timer = None
+        self.play_clock = QElapsedTimer()
         self.playing_elements = set()
         self.next_elements = set()
 
+        # Edits come in bursts (every mouse move of a drag changes an element),
+        # so saving waits until they settle and layout work is done at most
+        # once per event loop iteration.
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(self.SAVE_DELAY)
+        self.save_timer.timeout.connect(self.saveChanges)
+        QApplication.instance().aboutToQuit.connect(self.saveChanges)
+        self.unsaved_changes = False
+        # Counts changes, so that a finished save only marks the changes it
+        # contains as saved.
+        self.change_count = 0
+        self.saving_change_count = 0
+        self.layout_update_pending = False
+
         self.setMouseTracking(True)
         self.setFocusPolicy(Qt.FocusPolicy.ClickFocus)
         self.setMinimumWidth(self.MIN_WIDTH + self.EXTRA_WIDTH)
 
+        # paintEvent() fills every exposed pixel itself, so Qt doesn't need to
+        # erase the widget first.
+        self.setAttribute(Qt.WA_OpaquePaintEvent, True)
+
     def wheelEvent(self, event):
         scroll_bar = self.parent().parent().horizontalScrollBar()
         modifiers = QApplication.keyboardModifiers()
@@ -216,7 +437,10 @@ class Timeline(QWidget):
             # Scroll to maintain relative position of cursor on the timeline.
             mouse_pos = self.mapFromGlobal(QCursor.pos())
             new_value = (mouse_pos.x()) * self.scale / old_scale - (mouse_pos.x() - scroll_bar.value())
+            self.invalidate()
             self.updateTimeline()
+            # The new width has to be in place before scrolling into it.
+            self.updateWidth()
             scroll_bar.setValue(new_value)
         else:
             scroll_bar.setValue(
@@ -271,105 +495,115 @@ class Timeline(QWidget):
             elif self.resizing_element:
                 self.handleResize(event, stop=True)
                 self.resizing_element = None
+                # Dragged elements aren't pixel-aligned, redo its rect.
+                self.invalidate()
             elif self.moving_element:
                 self.handleMove(event, stop=True)
                 self.moving_element = None
+                self.invalidate()
             elif self.potential_moving_element:
                 self.select(self.potential_moving_element)
             else:
                 self.select(None)
             self.potential_moving_element = None
-        self.update()
 
-        # Save on any mouse button press which generally corresponds to an
-        # action worth saving (e.g. let go of a move).
-        saveProject()
+            # Letting go of the mouse generally ends an action worth saving
+            # (e.g. a move), if it changed anything.
+            if self.unsaved_changes:
+                self.save_timer.start()
+        self.update()
 
     def handleResize(self, event, start=False, stop=False):
         if start:
             self.resizing_start_pos = event.position()
             self.resizing_old_start = self.resizing_element.start
             self.resizing_old_length = self.resizing_element.length
+            self.drag_snaps = sorted(self.snaps(self.resizing_element))
 
+        # The snapped edge is worked out first and the element only updated
+        # once, since every start/length change goes through updateTimeline.
+        delta = (event.position().x() - self.resizing_start_pos.x()) * 1 / self.scale
+        old_right = self.resizing_old_start + self.resizing_old_length
         if (
             self.resizing_start_pos.x()
             < (self.resizing_old_start + self.resizing_old_length / 2) * self.scale
         ):
             # resize left handle
-            delta = (
-                (event.position().x() - self.resizing_start_pos.x()) * 1 / self.scale
-            )
-            self.resizing_element.start = self.resizing_old_start + delta
-            self.resizing_element.length = self.resizing_old_length - delta
+            new_start = self.resizing_old_start + delta
 
             # Snap to markings
-            for snap in self.snaps(self.resizing_element):
-                if abs(self.resizing_element.start - snap) < self.SNAP_MARKING_PIXELS:
-                    self.resizing_element.length += self.resizing_element.start - snap
-                    self.resizing_element.start = snap
-                    break
+            snap = findSnap(new_start, self.drag_snaps, self.snapTolerance())
+            if snap is not None:
+                new_start = snap
+
+            self.resizing_element.start = new_start
+            self.resizing_element.length = old_right - new_start
+            self.rowOf(self.resizing_element).reposition(self.resizing_element)
         else:
             # Resize right handle
-            delta = (
-                (event.position().x() - self.resizing_start_pos.x()) * 1 / self.scale
-            )
-            self.resizing_element.length = self.resizing_old_length + delta
+            new_right = old_right + delta
 
             # Snap to markings
-            for snap in self.snaps(self.resizing_element):
-                right = self.resizing_element.start + self.resizing_element.length
-                if abs(right - snap) < self.SNAP_MARKING_PIXELS:
-                    self.resizing_element.length = snap - self.resizing_element.start
-                    break
+            snap = findSnap(new_right, self.drag_snaps, self.snapTolerance())
+            if snap is not None:
+                new_right = snap
+
+            self.resizing_element.length = new_right - self.resizing_old_start
+
+    # Snap distance in timeline units, so that it stays the same on screen
+    # whatever the zoom level.
+    def snapTolerance(self):
+        return self.SNAP_MARKING_PIXELS / self.scale
 
     def snaps(self, exclude_element=None):
-        yield 0
-        yield self.playhead
+        snaps = [0, self.playhead]
         for row in self.rows:
-            for snap in row.snaps(exclude_element):
-                yield snap
+            snaps.extend(row.snaps(exclude_element))
+        return snaps
 
     def fineTimeSnaps(self):
-        yield 0
-        for row in self.rows:
-            if isinstance(row, TimeRow):
-                for snap in row.snaps():
-                    yield snap
+        if "fine" not in self.cached_snaps:
+            snaps = [0]
+            for row in self.rows:
+                if isinstance(row, TimeRow):
+                    snaps.extend(row.markingSnaps())
+            self.cached_snaps["fine"] = sorted(snaps)
+        return self.cached_snaps["fine"]
 
     def coarseTimeSnaps(self):
-        yield 0
-        for row in self.rows:
-            if isinstance(row, TimeRow):
-                for snap in row.snaps(coarse=True):
-                    yield snap
+        if "coarse" not in self.cached_snaps:
+            snaps = [0]
+            for row in self.rows:
+                if isinstance(row, TimeRow):
+                    snaps.extend(row.markingSnaps(coarse=True))
+            self.cached_snaps["coarse"] = sorted(snaps)
+        return self.cached_snaps["coarse"]
 
     def cueSnaps(self):
-        for row in self.rows:
-            if isinstance(row, (SceneRow, LightingRow)):
-                for element in row.elements:
-                    yield element.start
-                    yield element.start + element.length
+        if "cue" not in self.cached_snaps:
+            snaps = []
+            for row in self.rows:
+                if isinstance(row, (SceneRow, LightingRow)):
+                    snaps.extend(row.snaps())
+            self.cached_snaps["cue"] = sorted(snaps)
+        return self.cached_snaps["cue"]
 
     def handleMove(self, event, start=False, stop=False):
         if start:
             self.moving_start_pos = event.position()
             self.moving_old_start = self.moving_element.start
+            self.drag_snaps = sorted(self.snaps(self.moving_element))
 
         delta = (event.position().x() - self.moving_start_pos.x()) * 1 / self.scale
-        self.moving_element.start = self.moving_old_start + delta
+        new_start = self.moving_old_start + delta
 
-        for snap in self.snaps(self.moving_element):
-            if abs(self.moving_element.start - snap) < self.SNAP_MARKING_PIXELS:
-                self.moving_element.start = snap
-                break
+        snap = findSnap(new_start, self.drag_snaps, self.snapTolerance())
+        if snap is not None:
+            new_start = snap
+        self.moving_element.start = new_start
 
-        goal_row = None
-        current_row = None
-        for row, y in self.rowsOffsets():
-            if not goal_row and event.position().y() < y + row.HEIGHT:
-                goal_row = row
-            if row.contains(self.moving_element):
-                current_row = row
+        goal_row, _ = self.rowAt(event.position().y())
+        current_row = self.rowOf(self.moving_element)
 
         if (
             goal_row
@@ -378,17 +612,30 @@ class Timeline(QWidget):
         ):
             goal_row.add(self.moving_element)
             current_row.remove(self.moving_element)
+        else:
+            current_row.reposition(self.moving_element)
 
-    def rowsOffsets(self):
-        y = 0
+    def invalidate(self):
+        self.cached_snaps.clear()
         for row in self.rows:
-            yield row, y
-            y += row.HEIGHT
+            row.invalidate()
 
-    def elementsRects(self):
-        for row, y in self.rowsOffsets():
-            for elem, rect in row.elementsRects():
-                yield elem, rect.adjusted(0, y, 0, y)
+    def rowsOffsets(self):
+        return zip(self.rows, self.row_offsets)
+
+    # Returns the row at widget y and its offset, or (None, None).
+    # Row offsets are sorted, so the row containing y is found by bisecting.
+    def rowAt(self, y):
+        if not self.rows or y >= self.total_row_height:
+            return None, None
+        i = max(bisect_right(self.row_offsets, y) - 1, 0)
+        return self.rows[i], self.row_offsets[i]
+
+    def rowOf(self, element):
+        for row in self.rows:
+            if row.contains(element):
+                return row
+        return None
 
     def mouseInSeekArea(self, event):
         return self.playhead_height < event.position().y() < self.playhead_height + TimeRow.HEIGHT - Time.TEXT_HEIGHT
@@ -399,37 +646,42 @@ class Timeline(QWidget):
             self.playhead = self.accurate_playhead = event.position().x() / self.scale
             self.updatePlayhead()
 
-        # Set hovering object
+        # Only elements of the row under the cursor, and close enough to it
+        # for their resize handles to reach it, can be hit. A single pass over
+        # those finds both the hovered element and a resize handle.
+        old_hovering_element = self.hovering_element
         self.hovering_element = None
-        if not self.mouseInSeekArea(event):
-            for obj, rect in self.elementsRects():
-                if rect.contains(event.position()):
-                    self.hovering_element = obj
-                    break
-
-        # Check object resize handles
         self.potential_resizing_element = None
-        if not self.mouseInSeekArea(event):
-            for obj, rect in self.elementsRects():
-                left_rect = rect.adjusted(
-                    -self.RESIZE_OUTER_BOUND, 0, self.RESIZE_INNER_BOUND - rect.width(), 0
-                )
-                if left_rect.contains(event.position()):
-                    self.setCursor(QCursor(Qt.SplitHCursor))
-                    self.potential_resizing_element = obj
-                    break
-
-                right_rect = rect.adjusted(
-                    rect.width() - self.RESIZE_INNER_BOUND, 0, self.RESIZE_OUTER_BOUND, 0
-                )
-                if right_rect.contains(event.position()):
-                    self.setCursor(QCursor(Qt.SplitHCursor))
-                    self.potential_resizing_element = obj
-                    break
-
-        # Only reset cursor if not resizing and not hovering a handle
-        if not self.resizing_element and not self.potential_resizing_element:
-            self.setCursor(QCursor(Qt.ArrowCursor))
+        hit_row, hit_row_y = self.rowAt(event.position().y())
+        if hit_row and not self.mouseInSeekArea(event):
+            y = event.position().y() - hit_row_y
+            # Elements and their resize handles span the row minus padding.
+            if hit_row.ROW_PADDING / 2 <= y <= hit_row.HEIGHT - hit_row.ROW_PADDING / 2:
+                px = event.position().x()
+                x = px / self.scale
+                # One extra pixel of margin for the rounding of element rects.
+                margin = (self.RESIZE_OUTER_BOUND + 1) / self.scale
+                rects = hit_row.elementsRects()
+                for i in hit_row.elementsIn(x - margin, x + margin):
+                    obj, rect = rects[i]
+                    left = rect.left()
+                    right = rect.right()
+                    if not self.hovering_element and left <= px <= right:
+                        self.hovering_element = obj
+                    if not self.potential_resizing_element and (
+                        left - self.RESIZE_OUTER_BOUND <= px <= left + self.RESIZE_INNER_BOUND
+                        or right - self.RESIZE_INNER_BOUND <= px <= right + self.RESIZE_OUTER_BOUND
+                    ):
+                        self.potential_resizing_element = obj
+                    if self.hovering_element and self.potential_resizing_element:
+                        break
+
+        # Resize cursor while resizing or hovering a handle. Only touch the
+        # widget's cursor when the shape actually changes.
+        if self.resizing_element or self.potential_resizing_element:
+            self.setCursorShape(Qt.SplitHCursor)
+        else:
+            self.setCursorShape(Qt.ArrowCursor)
 
         # Send mouse event positions to objects
         if self.resizing_element:
@@ -441,7 +693,50 @@ class Timeline(QWidget):
             self.moving_element = self.potential_moving_element
             self.handleMove(event, start=True)
 
-        self.update()
+        # Most mouse moves change nothing that is drawn, so only repaint when
+        # the hover highlight changed or an element is being dragged. A hover
+        # change only needs the two elements involved repainted. Seeking
+        # repaints through updatePlayhead().
+        if self.resizing_element or self.moving_element:
+            self.update()
+        elif self.hovering_element != old_hovering_element:
+            for element in (old_hovering_element, self.hovering_element):
+                if element:
+                    self.update(self.elementUpdateRect(element))
+
+    # Widget area an element paints to, with room for its outline.
+    def elementUpdateRect(self, element):
+        for row, y in self.rowsOffsets():
+            if row.contains(element):
+                rect = QRectF(
+                    element.start * self.scale,
+                    y,
+                    element.length * self.scale,
+                    row.HEIGHT,
+                )
+                return rect.toAlignedRect().adjusted(
+                    -self.UPDATE_MARGIN, -1, self.UPDATE_MARGIN, 1
+                )
+        return QRect()
+
+    def setCursorShape(self, shape):
+        if shape == self.cursor_shape:
+            return
+        if shape == Qt.SplitHCursor:
+            self.setCursor(self.resize_cursor)
+        else:
+            self.setCursor(self.arrow_cursor)
+        self.cursor_shape = shape
+
+    # Closest snap before the playhead, or the start of the timeline.
+    def previousSnap(self, snaps):
+        i = bisect_left(snaps, self.accurate_playhead)
+        return max(snaps[i - 1], 0) if i > 0 else 0
+
+    # Closest snap after the playhead, or the playhead itself if there's none.
+    def nextSnap(self, snaps):
+        i = bisect_right(snaps, self.accurate_playhead)
+        return snaps[i] if i < len(snaps) else self.accurate_playhead
 
     def keyPressEvent(self, event):
         modifiers = QApplication.keyboardModifiers()
@@ -472,17 +767,9 @@ class Timeline(QWidget):
             elif modifiers & Qt.ShiftModifier:
                 self.seekRelative(-1)
             elif modifiers & Qt.ControlModifier:
-                prevSnap = 0
-                for snap in self.coarseTimeSnaps():
-                    if snap > prevSnap and snap < self.accurate_playhead:
-                        prevSnap = snap
-                self.seekAbsolute(prevSnap)
+                self.seekAbsolute(self.previousSnap(self.coarseTimeSnaps()))
             else:
-                prevSnap = 0
-                for snap in self.fineTimeSnaps():
-                    if snap > prevSnap and snap < self.accurate_playhead:
-                        prevSnap = snap
-                self.seekAbsolute(prevSnap)
+                self.seekAbsolute(self.previousSnap(self.fineTimeSnaps()))
             return
         elif event.key() == Qt.Key_Right:
             if modifiers & Qt.ShiftModifier and modifiers & Qt.ControlModifier:
@@ -490,86 +777,58 @@ class Timeline(QWidget):
             elif modifiers & Qt.ShiftModifier:
                 self.seekRelative(1)
             elif modifiers & Qt.ControlModifier:
-                # TODO: don't hardcode
-                nextSnap = 10e8
-                for snap in self.coarseTimeSnaps():
-                    if snap < nextSnap and snap > self.accurate_playhead:
-                        nextSnap = snap
-                self.seekAbsolute(nextSnap)
+                self.seekAbsolute(self.nextSnap(self.coarseTimeSnaps()))
             else:
-                # TODO: don't hardcode
-                nextSnap = 10e8
-                for snap in self.fineTimeSnaps():
-                    if snap < nextSnap and snap > self.accurate_playhead:
-                        nextSnap = snap
-                self.seekAbsolute(nextSnap)
+                self.seekAbsolute(self.nextSnap(self.fineTimeSnaps()))
             return
         elif event.key() == Qt.Key_Space:
             if modifiers & Qt.ShiftModifier:
-                prevSnap = 0
-                for snap in self.cueSnaps():
-                    if snap > prevSnap and snap < self.accurate_playhead:
-                        prevSnap = snap
-                self.seekAbsolute(prevSnap)
+                self.seekAbsolute(self.previousSnap(self.cueSnaps()))
             else:
-                # TODO: don't hardcode
-                nextSnap = 10e8
-                for snap in self.cueSnaps():
-                    if snap < nextSnap and snap > self.accurate_playhead:
-                        nextSnap = snap
-                self.seekAbsolute(nextSnap)
+                self.seekAbsolute(self.nextSnap(self.cueSnaps()))
         super().keyPressEvent(event)
 
     def paintEvent(self, event):
         painter = QPainter(self)
 
-        # Background
-        brush = QBrush()
-        brush.setColor(theme.BG)
-        brush.setStyle(Qt.SolidPattern)
-        rect = QRect(0, 0, self.size().width(), self.size().height())
-        painter.fillRect(rect, brush)
+        # Background (only the exposed region)
+        painter.fillRect(event.rect(), theme.BG)
 
-        pen = QPen()
-        pen.setColor(theme.OUTLINE)
-        pen.setWidth(0)
-
-        # Rendering bounds
-        scroll_bar = self.parent().parent().horizontalScrollBar()
-        bounds = scroll_bar.value(), scroll_bar.value() + scroll_bar.width()
+        # Rendering bounds, Qt already limits this to the visible area.
+        exposed = event.rect()
+        bounds = exposed.left(), exposed.right()
 
+        separators = []
         for row, y in self.rowsOffsets():
+            # Skip rows (and their separators) outside the exposed band.
+            if y + row.HEIGHT < exposed.top() or y > exposed.bottom():
+                continue
             row.paint(painter, y, bounds)
 
             # Bottom row separator
-            painter.setPen(pen)
-            painter.setRenderHint(QPainter.Antialiasing, False)
-            painter.drawLine(0, y + row.HEIGHT, self.size().width(), y + row.HEIGHT)
+            separators.append(
+                QLine(exposed.left(), y + row.HEIGHT, exposed.right(), y + row.HEIGHT)
+            )
+
+        painter.setPen(self.separator_pen)
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        painter.drawLines(separators)
 
         # Playhead
-        pen = QPen()
-        pen.setColor(theme.PLAYHEAD)
-        pen.setWidth(1)
-        brush = QBrush()
-        brush.setColor(theme.PLAYHEAD)
-        brush.setStyle(Qt.SolidPattern)
-        painter.setPen(pen)
-        painter.setBrush(brush)
-        painter.drawLine(self.playhead * self.scale, 0, self.playhead * self.scale, self.total_row_height)
-        points = [
-            QPoint(self.playhead * self.scale, self.playhead_height + self.PLAYHEAD_TOP_OFFSET),
-            QPoint(self.playhead * self.scale + 10, self.playhead_height + (TimeRow.HEIGHT - Time.TEXT_HEIGHT) / 2),
-            QPoint(self.playhead * self.scale, self.playhead_height + (TimeRow.HEIGHT - Time.TEXT_HEIGHT) - self.PLAYHEAD_BOTTOM_OFFSET),
-        ]
-        painter.drawPolygon(points)
+        painter.setPen(self.playhead_pen)
+        painter.setBrush(self.playhead_brush)
+        playhead_x = round(self.playhead * self.scale)
+        painter.drawLine(playhead_x, 0, playhead_x, self.total_row_height)
+        self.playhead_x = playhead_x
+        painter.translate(playhead_x, self.playhead_height)
+        painter.drawPolygon(self.playhead_arrow)
+        painter.resetTransform()
 
     def add(self, element_type, **kwargs):
         for row in self.rows:
             if row.canContain(element_type):
                 if "start" not in kwargs:
-                    kwargs["start"] = 0
-                    for element in row.elements:
-                        kwargs["start"] = max(kwargs["start"], element.start + element.length)
+                    kwargs["start"] = max(row.maxEnd(), 0)
                 if "length" not in kwargs:
                     kwargs["length"] = 1000
                 element = element_type(**kwargs)
@@ -580,7 +839,9 @@ class Timeline(QWidget):
 
     def addRow(self, row):
         self.rows.append(row)
-        self.total_row_height = sum([row.HEIGHT for row in self.rows])
+        self.cached_snaps.clear()
+        self.row_offsets.append(self.total_row_height)
+        self.total_row_height += row.HEIGHT
         self.playhead_height = 0
         for row in self.rows:
             if isinstance(row, TimeRow):
@@ -590,9 +851,7 @@ class Timeline(QWidget):
 
     def remove(self, element, row=None):
         if not row:
-            for r in self.rows:
-                if r.contains(element):
-                    row = r
+            row = self.rowOf(element)
         row.remove(element)
         if self.selected_element == element:
             self.hboxlayout.removeWidget(self.selected_element.getWidget())
@@ -602,13 +861,17 @@ class Timeline(QWidget):
 
     def startPlaying(self):
         self.play_timer = QTimer()
+        self.play_timer.setTimerType(Qt.PreciseTimer)
         self.play_timer.setInterval(self.TIMER_INTERVAL)
         self.play_timer.timeout.connect(self.playTimerTick)
+        self.play_clock.start()
         self.play_timer.start()
         self.playing = True
 
     def playTimerTick(self):
-        self.accurate_playhead += self.TIMER_INTERVAL * theme.PIXELS_PER_SECOND / 1000
+        # Advance by the time that actually passed, ticks aren't exact.
+        elapsed = self.play_clock.restart()
+        self.accurate_playhead += elapsed * theme.PIXELS_PER_SECOND / 1000
         self.playhead = int(self.accurate_playhead)
         self.updatePlayhead()
 
@@ -627,15 +890,18 @@ class Timeline(QWidget):
     def updatePlayhead(self):
         new_playing = set()
         new_next = set()
+        # Per row, the next element is the first one starting after the
+        # playhead, and only elements starting less than the longest element's
+        # length before it can be playing.
         for row in self.rows:
-            next_element = False
-            for element in row.elements:
-                if self.playhead < element.start:
-                    new_next.add(element)
-                    break
-                if element.start <= self.playhead < element.start + element.length:
-                    new_playing.add(element)
-                    next_element = True
+            starts, lengths = row.geometry()
+            next_i = bisect_right(starts, self.playhead)
+            if next_i < len(starts):
+                new_next.add(row.elements[next_i])
+            first = bisect_right(starts, self.playhead - row.max_length)
+            for i in range(first, next_i):
+                if starts[i] + lengths[i] > self.playhead:
+                    new_playing.add(row.elements[i])
         for element in self.playing_elements - new_playing:
             element.exit()
         for element in new_playing - self.playing_elements:
@@ -644,7 +910,22 @@ class Timeline(QWidget):
             element.enterNextInRow()
         self.playing_elements = new_playing
         self.next_elements = new_next
-        self.update()
+
+        # Only the playhead moved, repaint the strips it left (where it was
+        # last painted) and entered.
+        playhead_x = round(self.playhead * self.scale)
+        if playhead_x != self.playhead_x:
+            self.update(self.playheadUpdateRect(self.playhead_x))
+        self.update(self.playheadUpdateRect(playhead_x))
+
+    # Widget area the playhead paints to at x, including its arrow.
+    def playheadUpdateRect(self, x):
+        return QRect(
+            x - self.UPDATE_MARGIN,
+            0,
+            self.PLAYHEAD_ARROW_WIDTH + 2 * self.UPDATE_MARGIN + 1,
+            self.total_row_height + 1,
+        )
 
     def save(self):
         return {
@@ -657,16 +938,56 @@ class Timeline(QWidget):
         timeline = cls(hboxlayout, scale)
         for row in rows:
             timeline.addRow(Row.load(timeline, **row))
+        # Setting up the loaded elements went through updateTimeline, but
+        # nothing changed since the project was read.
+        timeline.unsaved_changes = False
+        timeline.save_timer.stop()
         timeline.update()
         return timeline
 
     def updateWidth(self):
-        w = self.MIN_WIDTH
-        for _, rect in self.elementsRects():
-            w = max(w, rect.x() + rect.width())
+        end = max((row.maxEnd() for row in self.rows), default=0)
+        w = max(self.MIN_WIDTH, round(end * self.scale))
         self.setMinimumWidth(w + self.EXTRA_WIDTH)
 
     def updateTimeline(self):
-        saveProject()
+        # Drags keep their row ordered themselves; anything else (e.g. the
+        # property widgets) may have moved an element.
+        if not self.moving_element and not self.resizing_element:
+            for row in self.rows:
+                row.sort()
+        # Element geometry or the scale changed. Mid-drag only the dragged
+        # element changes, so the other rows keep their cached rects (a scale
+        # change invalidates everything through wheelEvent).
+        dragged = self.moving_element or self.resizing_element
+        if dragged:
+            self.cached_snaps.clear()
+            self.rowOf(dragged).invalidate()
+        else:
+            self.invalidate()
+        # Saving mid-drag would only write out intermediate positions, the
+        # mouse release schedules the save instead.
+        self.unsaved_changes = True
+        self.change_count += 1
+        if not self.moving_element and not self.resizing_element:
+            self.save_timer.start()
+        if not self.layout_update_pending:
+            self.layout_update_pending = True
+            QTimer.singleShot(0, self.flushLayoutUpdate)
+
+    def flushLayoutUpdate(self):
+        self.layout_update_pending = False
         self.updateWidth()
-        self.update()
\ No newline at end of file
+        self.update()
+
+    # Changes stay unsaved until the project writer reports them written,
+    # see changesSaved().
+    def saveChanges(self):
+        self.save_timer.stop()
+        if self.unsaved_changes:
+            self.saving_change_count = self.change_count
+            saveProject()
+
+    def changesSaved(self):
+        if self.change_count == self.saving_change_count:
+            self.unsaved_changes = False
\ No newline at end of file
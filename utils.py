@@ -1,13 +1,15 @@
+import json
 from functools import lru_cache
+from itertools import chain
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from PySide6.QtWidgets import QApplication, QHBoxLayout, QLabel
 from PySide6.QtGui import QFontMetrics
 
-def chain(*iterators):
-    for iterator in iterators:
-        for element in iterator:
-            yield element
-
 def widgetWithLabel(widget, label_text):
     hbox = QHBoxLayout()
     label = QLabel(label_text)
@@ -21,6 +23,30 @@ def updateTimelineReceiver(*args):
 def saveProject(*args):
     QApplication.instance().saveProject.emit()
 
-@lru_cache(maxsize=None)
+# Project files are UTF-8 JSON. orjson is much faster when installed, the
+# fallback writes the same bytes (non-ASCII kept as is). Both keep the file
+# indented since it's also edited by hand (e.g. presets).
+def dumpProject(project):
+    if orjson:
+        return orjson.dumps(project, option=orjson.OPT_INDENT_2)
+    return json.dumps(project, indent=2, ensure_ascii=False).encode("utf-8")
+
+# Read as bytes so the file decodes as UTF-8 whatever the locale's encoding.
+def readProject(path):
+    with open(path, "rb") as f:
+        return json.loads(f.read())
+
+# Font metrics by font key. Fonts are few and long-lived (see theme), the
+# strings measured with them aren't, so widths are cached per (key, text) in
+# a bounded cache.
+font_metrics = {}
+
 def textWidth(font, text):
-    return QFontMetrics(font).horizontalAdvance(text)
+    key = font.key()
+    if key not in font_metrics:
+        font_metrics[key] = QFontMetrics(font)
+    return keyedTextWidth(key, text)
+
+@lru_cache(maxsize=4096)
+def keyedTextWidth(font_key, text):
+    return font_metrics[font_key].horizontalAdvance(text)